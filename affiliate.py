@@ -3,11 +3,31 @@
 for each author."""
 
 import argparse
-from collections import OrderedDict
 
 __author__ = 'Hayden Metsky <hayden@mit.edu>'
 
 
+def _read_lines(fn):
+    """Read all lines of a file at once.
+
+    Unlike str.splitlines(), this only breaks lines on the line endings
+    recognized when iterating over the file (which universal newlines
+    translates to '\n').
+
+    Args:
+        fn: path to file
+
+    Returns:
+        list of lines in fn, without line endings
+    """
+    with open(fn) as f:
+        lines = f.read().split('\n')
+    if lines[-1] == '':
+        # Drop the empty string that follows a final newline
+        lines.pop()
+    return lines
+
+
 def read_authors(fn):
     """Read list of authors and shortcuts of their affiliations.
 
@@ -18,15 +38,13 @@ def read_authors(fn):
             affiliations
 
     Returns:
-        ordered dict {author name: list of shorthands for affiliations},
+        dict {author name: list of shorthands for affiliations},
         where the order of authors is the same as in the given file
     """
-    authors = OrderedDict()
-    with open(fn) as f:
-        for line in f:
-            author, affiliations = line.strip().split('\t')
-            affiliations = affiliations.split(',')
-            authors[author] = affiliations
+    authors = {}
+    for line in _read_lines(fn):
+        author, affiliations = line.strip().split('\t')
+        authors[author] = affiliations.split(',')
     return authors
 
 
@@ -43,10 +61,9 @@ def read_affiliations(fn):
         dict {shorthand for affiliation: full name of affiliation}
     """
     affiliations = {}
-    with open(fn) as f:
-        for line in f:
-            shorthand, fullname = line.rstrip().split('\t')
-            affiliations[shorthand] = fullname
+    for line in _read_lines(fn):
+        shorthand, fullname = line.rstrip().split('\t')
+        affiliations[shorthand] = fullname
     return affiliations
 
 
@@ -56,77 +73,97 @@ def main(args):
     affiliations = read_affiliations(args.affiliations)
 
     # Verify that each author's affiliation has a name
-    for author in authors:
-        for affiliation in authors[author]:
-            if affiliation not in affiliations:
-                raise Exception(("Author %s has affiliation %s but the "
-                    "name of that affiliation was not given") % (author,
-                    affiliation))
-
-    # Order affiliations according to the author order
+    used = set().union(*authors.values())
+    missing = used - affiliations.keys()
+    if missing:
+        # Report which authors use each missing shorthand
+        missing_desc = []
+        for affiliation in sorted(missing):
+            users = [author for author in authors
+                     if affiliation in authors[author]]
+            missing_desc.append("%s (used by %s)" % (affiliation,
+                ', '.join(users)))
+        raise Exception(("No name was given for affiliation "
+            "shorthand(s): %s") % '; '.join(missing_desc))
+
+    # In a single pass over the authors, number the affiliations according
+    # to the author order and generate HTML and LaTeX of authors with their
+    # affiliations numbered
     affiliations_number = {}
     curr_num = 1
-    for author in authors:
-        for affiliation in authors[author]:
-            if affiliation not in affiliations_number:
-                affiliations_number[affiliation] = curr_num
-                curr_num += 1
-    affiliations_ordered = sorted(list(affiliations.keys()),
-        key=lambda x: affiliations_number[x])
-
-    # Generate HTML and LaTeX of authors with their affiliations numbered
-    author_html = ''
-    author_latex = ''
-    for i, author in enumerate(authors):
-        numbers = [affiliations_number[x] for x in authors[author]]
-        numbers_str = ','.join([str(x) for x in sorted(numbers)])
+    author_html_parts = []
+    author_latex_parts = []
+    numbers_str_cache = {}
+    for i, (author, author_affiliations) in enumerate(authors.items()):
+        # Many authors often share the same affiliations; if this list of
+        # affiliations has been seen, its affiliations are already numbered,
+        # so reuse the formatted numbers
+        key = tuple(author_affiliations)
+        numbers_str = numbers_str_cache.get(key)
+        if numbers_str is None:
+            numbers = []
+            for affiliation in author_affiliations:
+                number = affiliations_number.get(affiliation)
+                if number is None:
+                    affiliations_number[affiliation] = number = curr_num
+                    curr_num += 1
+                numbers.append(number)
+            numbers_str = ','.join(map(str, sorted(numbers)))
+            numbers_str_cache[key] = numbers_str
         if i > 0:
-            author_html += ', '
-            author_latex += ',\n'
+            author_html_parts.append(', ')
+            author_latex_parts.append(',\n')
 
-        author_html += author + '<sup>' + numbers_str + '</sup>'
+        author_html_parts.append(f'{author}<sup>{numbers_str}</sup>')
 
         # For LaTeX, put an mbox around the last name and another around
         # everything before the last name, so that neither of these two
         # pieces are split with a line break
         author_split = author.split(' ')
-        author_mbox = ('\mbox{' + ' '.join(author_split[:-1]) + '} ' +
-            '\mbox{' + author_split[-1] + '}')
-        author_latex += author_mbox + '$^{' + numbers_str + '}$'
-    author_latex += '\n'
+        first_names = ' '.join(author_split[:-1])
+        last_name = author_split[-1]
+        author_latex_parts.append(f'\\mbox{{{first_names}}} '
+            f'\\mbox{{{last_name}}}$^{{{numbers_str}}}$')
+    author_latex_parts.append('\n')
+
+    # Order affiliations according to the author order
+    affiliations_ordered = sorted(affiliations,
+        key=affiliations_number.__getitem__)
 
     # Generate HTML and LaTeX of affiliations with their full names
-    affiliations_html = ''
-    affiliations_latex = ''
+    affiliations_html_parts = []
+    affiliations_latex_parts = []
     for i, affiliation in enumerate(affiliations_ordered):
-        number = str(affiliations_number[affiliation])
+        number = affiliations_number[affiliation]
         fullname = affiliations[affiliation]
         if i > 0:
-            affiliations_html += ' '
+            affiliations_html_parts.append(' ')
 
-        affiliations_html += '<sup>' + number + '</sup>' + fullname + '.'
-        affiliations_latex += '$^{' + number + '}$' + fullname + '.\n'
+        affiliations_html_parts.append(f'<sup>{number}</sup>{fullname}.')
+        affiliations_latex_parts.append(f'$^{{{number}}}${fullname}.\n')
 
     # Write HTML
+    html_doc = (''.join(author_html_parts) + '<br><br>' +
+        ''.join(affiliations_html_parts))
     with open(args.out_html, 'w') as f:
-        f.write(author_html)
-        f.write('<br><br>')
-        f.write(affiliations_html)
+        f.write(html_doc)
 
     # Write LaTeX if desired
     if args.out_latex:
+        latex_doc = ''.join([
+            '%%%%%%%%%%%%%%%%%%%%%\n',
+            '%% LIST OF AUTHORS %%\n',
+            '%%%%%%%%%%%%%%%%%%%%%\n',
+            *author_latex_parts,
+            '%%%%%%%%%%%%%%%%%%%%%\n',
+            '\n\n',
+            '%%%%%%%%%%%%%%%%%%%%%%%%%%\n',
+            '%% LIST OF AFFILIATIONS %%\n',
+            '%%%%%%%%%%%%%%%%%%%%%%%%%%\n',
+            *affiliations_latex_parts,
+            '%%%%%%%%%%%%%%%%%%%%%%%%%%\n'])
         with open(args.out_latex, 'w') as f:
-            f.write('%%%%%%%%%%%%%%%%%%%%%\n')
-            f.write('%% LIST OF AUTHORS %%\n')
-            f.write('%%%%%%%%%%%%%%%%%%%%%\n')
-            f.write(author_latex)
-            f.write('%%%%%%%%%%%%%%%%%%%%%\n')
-            f.write('\n\n')
-            f.write('%%%%%%%%%%%%%%%%%%%%%%%%%%\n')
-            f.write('%% LIST OF AFFILIATIONS %%\n')
-            f.write('%%%%%%%%%%%%%%%%%%%%%%%%%%\n')
-            f.write(affiliations_latex)
-            f.write('%%%%%%%%%%%%%%%%%%%%%%%%%%\n')
+            f.write(latex_doc)
 
 
 if __name__ == '__main__':